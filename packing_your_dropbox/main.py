@@ -1,4 +1,4 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 # coding: utf-8
 
 #
@@ -8,75 +8,43 @@
 #
 
 import sys
+import bisect
 
 #--------------------------------------#
-#    Drawing and joining functions     #
+#         Drawing functions            #
 #--------------------------------------#
 BOX_SPACE = " "
 
 
 def draw_box(w, h):
     '''
-    Draw box as char matrix.
+    Draw box as a list of rows.
     INPUT:
       w - integer, width of a box
       h - integer, height of a box.
     OUTPUT:
-      box - list of lists with chars
+      box - list of strings, one per row
     '''
     if h == 1: # just a row
-        return [[BOX_SPACE] + (['+'] * w)]
+        return [BOX_SPACE + '+' * w]
     if w == 1: # just a column
-        return [[BOX_SPACE] + ['+'] for i in xrange(h)]
-    box = []
+        return [BOX_SPACE + '+'] * h
     # subtract 1 from w because of space prefix
-    first_line = last_line = [BOX_SPACE] + ['+'] + ([' ', '-', ' '] * (w-1)) + ['+']
-    box.append(first_line)
-    for i in xrange(h-2):
-        # w must be multiplied by 3 because we use string ' - ' as a width unit.
-        box.append([BOX_SPACE] + ['|'] + [' ' * ((w-1)*3)] + ['|'])
-    box.append(last_line)
-    return box
+    border = BOX_SPACE + '+' + ' - ' * (w-1) + '+'
+    # w must be multiplied by 3 because we use string ' - ' as a width unit.
+    mid = BOX_SPACE + '|' + ' ' * ((w-1)*3) + '|'
+    return [border] + [mid] * (h-2) + [border]
 
 
 def format_box(box):
     '''
     Format box as string ready for printing.
     INPUT:
-      box - matrix with box
+      box - list of rows
     OUTPUT:
       s - string, ready for printing
     '''
-    s = ""
-    for i in range(len(box)):
-        s += ''.join(box[i])
-        s += '\n'
-    return s
-
-
-def join(box1, box2):
-    '''
-    Join box2 to box1 at the right-top.
-    '''
-    result_box = []
-    box1_height = len(box1)
-    box2_height = len(box2)
-    if box1_height != box2_height:
-        for i in xrange(max(box1_height, box2_height)):
-            if i >= len(box1):
-                row = [BOX_SPACE] * len(box1[0])
-            else:
-                row = []
-                row += box1[i]
-            if i >= len(box2):
-                row.extend([BOX_SPACE] * len(box2[0]))
-            else:
-                row.extend(box2[i])
-            result_box.append(row)
-    else:
-        for i in xrange(box1_height):
-            result_box.append(box1[i] + box2[i])
-    return result_box
+    return '\n'.join(box) + '\n'
 
 #------------------#
 #    OO Classes    #
@@ -86,40 +54,34 @@ class Box(object):
     A box
     '''
 
-    HORIZONTAL_SHAPE = 0
-    VERTICAL_SHAPE = 1
+    __slots__ = ('width', 'height')
 
     def __init__(self, width, height):
-        if width <= 0 or not isinstance(width, int):
+        if type(width) is not int or width <= 0:
             raise TypeError("width must be a positive integer")
-        if height <= 0 or not isinstance(height, int):
+        if type(height) is not int or height <= 0:
             raise TypeError("height must be a positive integer")
-        self._width = width
-        self._height = height
+        self.width = width
+        self.height = height
 
-    @property
-    def shape(self):
-        if self.width >= self.height:
-            return self.HORIZONTAL_SHAPE
-        else:
-            return self.VERTICAL_SHAPE
-
-    @property
-    def width(self):
-        return self._width
-
-    @property
-    def height(self):
-        return self._height
+    @classmethod
+    def _unchecked(cls, width, height):
+        '''
+        Make a box from already validated width and height.
+        '''
+        box = cls.__new__(cls)
+        box.width = width
+        box.height = height
+        return box
 
     def rotate(self):
-        return self.__class__(self._height, self._width)
+        return self._unchecked(self.height, self.width)
 
     def __str__(self):
-        return format_box(draw_box(self._width, self._height))
+        return format_box(draw_box(self.width, self.height))
 
     def __repr__(self):
-        return "<Box %sx%s instance at %s>" % (self._width, self._height, hex(id(self)))
+        return f"<Box {self.width}x{self.height} instance at {id(self):#x}>"
 
 
 class Shelf(object):
@@ -130,40 +92,130 @@ class Shelf(object):
         self._w = width
         self._h = height
         self._boxes = []
+        self._used_w = 0
+        self._max_h = 0
 
     def is_fits_in(self, box):
-        if box.width + sum(b.width for b in self._boxes) > self._w:
-            return False
-        elif box.height > self._h:
-            return False
-        else:
-            return True
+        return box.width + self._used_w <= self._w and box.height <= self._h
 
     def add_box(self, box):
         if not self.is_fits_in(box):
-            raise ValueError("Box %r is to large" % box)
+            raise ValueError(f"Box {box!r} is to large")
         self._boxes.append(box)
+        self._used_w += box.width
+        self._max_h = max(self._max_h, box.height)
 
     @property
     def size(self):
-        return sum(b.width for b in self._boxes), max(b.height for b in self._boxes)
+        return self._used_w, self._max_h
 
     def __str__(self):
         if not len(self._boxes):
             return ''
-        return format_box(reduce(join, [draw_box(b.width, b.height) for b in self._boxes]))
+        # Same picture as draw_box() rows placed side by side, but written straight
+        # into one buffer. Column widths follow draw_box: a single row takes
+        # 1+w chars, a single column 2 chars and any other box 3*w chars.
+        widths = []
+        for b in self._boxes:
+            if b.height == 1:
+                widths.append(1 + b.width)
+            elif b.width == 1:
+                widths.append(2)
+            else:
+                widths.append(3 * b.width)
+        line = sum(widths) + 1 # plus '\n'
+        buf = bytearray(b' ' * (line * self._max_h))
+        buf[line-1::line] = b'\n' * self._max_h
+        x = 0
+        for b, bw in zip(self._boxes, widths):
+            w, h = b.width, b.height
+            if h == 1:
+                buf[x+1:x+1+w] = b'+' * w
+            elif w == 1:
+                buf[x+1:x+1+line*h:line] = b'+' * h
+            else:
+                border = b'+' + b' - ' * (w-1) + b'+'
+                last = line * (h-1)
+                buf[x+1:x+bw] = border
+                buf[last+x+1:last+x+bw] = border
+                buf[x+1+line:last:line] = b'|' * (h-2)
+                buf[x+bw-1+line:last:line] = b'|' * (h-2)
+            x += bw
+        return buf.decode('ascii')
 
     def __repr__(self):
-        return "<%s instance. Size is %s with %s boxes at %s>" % (
-            self.__class__.__name__,
-            self.size,
-            len(self._boxes),
-            hex(id(self))
-        )
+        return (f"<{self.__class__.__name__} instance. Size is {self.size} "
+                f"with {len(self._boxes)} boxes at {id(self):#x}>")
 
 #------------------#
 #    Main logic    #
 #------------------#
+def pack(widths, heights, max_w):
+    '''
+    Greedy shelf packing over plain integers (see main for the heuristic).
+    INPUT:
+      widths - list of integers, box widths
+      heights - list of integers, box heights
+      max_w - integer, width of every shelf
+    OUTPUT:
+      shelf_ids - list of integers, shelf index of every box
+      rotated - list of booleans, True if a box was placed rotated
+      shelf_h - list of integers, height of every shelf
+      total_w - integer, width of the widest shelf
+      total_h - integer, sum of shelf heights
+    '''
+    n = len(widths)
+    shelf_ids = [0] * n
+    rotated = [False] * n
+    shelf_used_w = []
+    shelf_h = []
+    tallest = 0
+    total_w = total_h = 0
+    # (free width, shelf index) pairs, kept sorted for best-fit lookups
+    free = []
+    for i in range(n):
+        w = widths[i]
+        h = heights[i]
+        upright = (w, h, False)
+        turned = (h, w, True)
+        # vertical orientation goes first, horizontal one is last
+        candidates = ((turned, upright), (upright, turned))[w < h]
+        fits = False
+        for cw, ch, r in candidates:
+            if ch > tallest: # no shelf can hold it, skip the scan
+                continue
+            # the tightest shelf with enough free width and height wins
+            pos = bisect.bisect_left(free, (cw, -1))
+            while pos < len(free):
+                if ch <= shelf_h[free[pos][1]]:
+                    fits = True
+                    break
+                pos += 1
+            if fits:
+                idx = free.pop(pos)[1]
+                shelf_used_w[idx] += cw
+                if shelf_used_w[idx] > total_w:
+                    total_w = shelf_used_w[idx]
+                bisect.insort(free, (max_w - shelf_used_w[idx], idx))
+                shelf_ids[i] = idx
+                rotated[i] = r
+                break
+        if not fits:
+            idx = len(shelf_h)
+            cw, ch, r = candidates[-1]
+            shelf_used_w.append(cw)
+            shelf_h.append(ch)
+            if ch > tallest:
+                tallest = ch
+            if cw > total_w:
+                total_w = cw
+            total_h += ch
+            bisect.insort(free, (max_w - cw, idx))
+            shelf_ids[i] = idx
+            rotated[i] = r
+    return shelf_ids, rotated, shelf_h, total_w, total_h
+
+
 def main():
     '''
     Note that this problem is NP-hard :-)
@@ -171,59 +223,39 @@ def main():
 
     1. Sort boxes by non descreasing min(height, width).
        (we have to use min because we can rotate boxes)
-    2. Insert box into a shelf:
+    2. Insert box into a shelf (best fit: the shelf with the least free width that
+       can hold the box):
        2a. A box that initializes a new shelf is always horizontally oriented.
            (to keep as low as possible the vertical occupancy of the corresponding shelf)
        2b. When a box is inserted into existing shelf, if both orientations are OK then
            the vertical one is selected.
            (to keep as low as possible the horizontal occupancy of the shelf)
+       2c. A new shelf is opened only if the box fits in no existing shelf in either
+           orientation.
     3. The area of enclosing box computed as the max box width multipled by sum of shelf's heights.
+
+    Packing itself is done by pack() on plain integer lists, Box and Shelf
+    objects are only built afterwards for drawing.
     '''
-    n = int(raw_input())
+    # read the whole input at once, it is just a stream of integers
+    tokens = iter(sys.stdin.read().split())
+    n = int(next(tokens))
     if n <= 0:
         raise ValueError("n must be > 0")
-    boxes = []
-    for i in range(n):
-        w, h = [int(x) for x in raw_input().split()]
-        boxes.append(Box(w, h))
-    boxes.sort(key=lambda b: min([b.width, b.height]), reverse=True)
+    boxes = [Box(int(next(tokens)), int(next(tokens))) for i in range(n)]
+    min_sides = [b.width if b.width < b.height else b.height for b in boxes]
+    order = sorted(range(n), key=min_sides.__getitem__, reverse=True)
+    boxes = [boxes[i] for i in order]
     max_w = max(b.width for b in boxes)
-    shelfs = []
-    for b in boxes:
-        rb = b.rotate()
-        fits = False
-        for cur_s in shelfs:
-            box_to_add = None
-            if b.shape == b.VERTICAL_SHAPE:
-                if cur_s.is_fits_in(b):
-                    box_to_add = b
-                    fits = True
-                elif cur_s.is_fits_in(rb):
-                    box_to_add = rb
-                    fits = True
-            else:
-                if cur_s.is_fits_in(rb):
-                    box_to_add = rb
-                    fits = True
-                elif cur_s.is_fits_in(b):
-                    box_to_add = b
-                    fits = True
-            if fits:
-                cur_s.add_box(box_to_add)
-                break
-        if not fits:
-            if b.shape != b.HORIZONTAL_SHAPE:
-                b = b.rotate()
-            s = Shelf(max_w, b.height)
-            s.add_box(b)
-            shelfs.append(s)
-
-    total_width = max(s.size[0] for s in shelfs)
-    total_height = sum(s.size[1] for s in shelfs)
+    shelf_ids, rotated, shelf_h, total_width, total_height = pack(
+        [b.width for b in boxes], [b.height for b in boxes], max_w)
+    shelfs = [Shelf(max_w, h) for h in shelf_h]
+    for b, idx, r in zip(boxes, shelf_ids, rotated):
+        shelfs[idx].add_box(b.rotate() if r else b)
 
-    print total_width * total_height
+    print(total_width * total_height)
 
-    sys.stderr.write("%sx%s\n" % (total_width, total_height))
+    sys.stderr.write(f"{total_width}x{total_height}\n")
     for s in shelfs:
         sys.stderr.write(str(s))
 